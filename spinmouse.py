@@ -1,7 +1,7 @@
 from src.config import Config
-from src.setup import setup_experiment
-from src.camera import CameraSystem
-from src.acquire import run_experiment_cli, run_experiment_gui
+from src.video import select_encoder, video_file_extension
+from concurrent.futures import ThreadPoolExecutor
+import importlib
 import os
 import shutil
 import sys
@@ -22,6 +22,13 @@ def main():
 
     exit_status = True
 
+    # Load PySpin (and the Spinnaker libraries) in a worker thread while the config is
+    # read and checked. The module is only used through the future's result, which
+    # waits for the import to finish and re-raises any import error here.
+    import_executor = ThreadPoolExecutor(max_workers=1)
+    camera_module = import_executor.submit(importlib.import_module, "src.camera")
+    import_executor.shutdown(wait=False)  # the worker exits once the import is done
+
     root_dir = os.path.dirname(os.path.abspath(__file__))
     config = Config(root_dir)
 
@@ -35,24 +42,54 @@ def main():
         input("Press Enter to exit...")
         return False
 
+    if shutil.which('ffmpeg') is None:
+        # raw video is saved without ffmpeg; only transcode_raw.py needs it
+        if config.parameters['video_codec'] == "raw":
+            print("WARNING: ffmpeg was not found. It is needed to transcode the raw video (transcode_raw.py)\n")
+        else:
+            print("USER ACTION: ffmpeg was not found. Install ffmpeg, add it to PATH, and restart\n")
+            input("Press Enter to exit...")
+            return False
+
+    # Test the hardware encoders now, rather than when the recording starts and
+    # images are already piling up in the buffer
+    if config.parameters['video_codec'] == "auto":
+        config.parameters['video_codec'] = select_encoder("auto")
+        print(f"Video encoder: {config.parameters['video_codec']}\n")
+
+        # presets are specific to each encoder
+        if config.parameters['video_preset']:
+            print("WARNING: 'video_preset' is ignored when 'video_codec' is 'auto'. Set 'video_codec' to use a preset\n")
+            config.parameters['video_preset'] = ""
+
     MINIMUM_HD_FREE_SPACE = 10  # GB
-    print(f"Remaining hard drive space: {shutil.disk_usage(config.parameters['data_directory']).free/1024**3:.1f} GB\n")
-    if shutil.disk_usage(config.parameters['data_directory']).free < MINIMUM_HD_FREE_SPACE*1024**3:
+    free_space = shutil.disk_usage(config.parameters['data_directory']).free
+    print(f"Remaining hard drive space: {free_space/1024**3:.1f} GB\n")
+    if free_space < MINIMUM_HD_FREE_SPACE*1024**3:
         print(f"USER ACTION: There is less than {MINIMUM_HD_FREE_SPACE} GB of hard disk space remaining. Free up space and restart\n")
         input("Press Enter to exit...")
         return False
 
+    # Wait for the background import (the config checks above don't need PySpin);
+    # an ImportError from the worker is raised here
+    CameraSystem = camera_module.result().CameraSystem
+
     # Connect to camera system using context manager to ensure graceful shutdown.
     with CameraSystem() as camera_system:
         if camera_system.camera is None:
             return False
 
+        # Imported while the camera initializes in the background
+        from src.setup import setup_experiment
+        from src.acquire import run_experiment_cli, run_experiment_gui
+
         if setup_experiment(camera_system, config) is False:
             print("\n\nExperiment setup canceled: exiting system\n")
             return False
 
-        if os.path.isfile(config.parameters['file_path'] + '.avi'):
-            print(f"WARNING: This video file already exists {config.parameters['file_path']}.avi")
+        video_file_path = config.parameters['file_path'] + video_file_extension(config.parameters['video_codec'])
+        if os.path.isfile(video_file_path):
+            print(f"WARNING: This video file already exists {video_file_path}")
             user_input = input('Do you want to overwrite?  (y/n): ')
             if user_input.lower() != 'y':
                 return False
@@ -1,13 +1,58 @@
 import PySpin
 from collections import deque
 import threading
-import cv2
-import csv
-import time
 import tkinter as tk
 from PIL import Image, ImageTk
 import numpy as np
-from time import perf_counter
+from src.video import open_video_writer
+from src.ring_buffer import RingBuffer
+from src.timestamps import TimestampLog
+from src.scheduling import pin_current_thread, raise_current_thread_priority
+
+
+# How long GetNextImage waits for an image. Each timeout raises an exception, so a
+# short timeout is costly while the camera is idle; a long one delays stopping.
+GRAB_TIMEOUT_MS = 500
+
+# How long the acquisition thread waits for a free image buffer slot before
+# dropping an image. Meanwhile, new images queue up in the camera's stream buffers.
+BUFFER_FULL_TIMEOUT = 1.0  # seconds
+
+# Images received between updates of the "Receiving images" animation
+RECEIVING_MESSAGE_INTERVAL = 100
+
+# Incomplete images between "Image incomplete" messages, so a burst of them
+# (e.g. a flaky USB connection) doesn't flood the terminal
+INCOMPLETE_MESSAGE_INTERVAL = 100
+
+# CPUs for the acquisition and saving threads (CPU 0 handles most hardware interrupts)
+ACQUIRE_THREAD_CPU = 1
+SAVE_THREAD_CPU = 2
+
+# Maximum number of buffered images sent to the video writer in a single write
+WRITE_BATCH_SIZE = 16
+
+# Largest (width, height) of the video feed shown in the acquisition GUI. Larger
+# images are downsampled by skipping pixels before they are copied for display.
+DISPLAY_MAX_SIZE = (640, 480)
+
+# Frame IDs and timestamps waiting to be logged. Entries are tiny, so this is sized
+# to never fill up while the image buffer still has room.
+TIMESTAMP_BUFFER_SIZE = 100000
+
+
+def display_step(image_shape):
+    """Returns the pixel step that downsamples an image to fit in DISPLAY_MAX_SIZE.
+
+    Args:
+        image_shape (tuple): Image (height, width) in pixels
+
+    Returns:
+        int: Keep every n-th row and column of the image (1 keeps all of them)
+    """
+    image_height, image_width = image_shape
+    max_width, max_height = DISPLAY_MAX_SIZE
+    return max(1, -(-image_width // max_width), -(-image_height // max_height))
 
 
 class waitAnimation:
@@ -45,6 +90,7 @@ class FrameCounter:
     """
     Tracks acquired, buffered, and dropped frames
     """
+    __slots__ = ('acquired', 'buffered', 'dropped', 'last_frameid')
 
     def __init__(self):
         self.acquired = 0
@@ -76,21 +122,114 @@ class FrameCounter:
 
     def print(self):
         # print current counter values in terminal
-        acquired = str(self.acquired).rjust(12, " ")
-        buffered = str(self.buffered).rjust(12, " ")
-        dropped = str(self.dropped).rjust(12, " ")
-        print(f"Acquired: {acquired}  |  Buffered: {buffered}  |  Dropped: {dropped}")
+        print(f"Acquired: {self.acquired:>12}  |  Buffered: {self.buffered:>12}  |  Dropped: {self.dropped:>12}")
+
+
+class ImageDecoder:
+    """
+    Turns camera images into Mono8 arrays of the recording's image size
+
+    Shared by "acquire_images" and "acquire_and_save_images". Incomplete images and
+    images of the wrong size (e.g. a truncated buffer) are discarded and counted,
+    with a message every INCOMPLETE_MESSAGE_INTERVAL images.
+
+    Attributes:
+        image_shape (tuple): Image (height, width) in pixels
+        images_incomplete (int): Number of incomplete images discarded
+        images_wrong_size (int): Number of images of the wrong size discarded
+    """
+    def __init__(self, camera_system, config, image_shape, read_chunk_data=True):
+        """
+        Args:
+            camera_system (CameraSystem) Reference to CameraSystem object
+            config (Config): Reference to Config object
+            image_shape (tuple): Image (height, width) in pixels
+            read_chunk_data (bool, optional): If True, read each image's frame ID and
+                timestamp (chunk data must be enabled). Otherwise, both are 0.
+        """
+        self.image_shape = image_shape
+        self._image_size = image_shape[0] * image_shape[1]
+        self._read_chunk_data = read_chunk_data
+
+        # Mono8 images don't need to be converted
+        self._source_is_mono8 = camera_system.camera.get_pixel_format() == PySpin.PixelFormat_Mono8
+        self._color_processing_algorithm = getattr(PySpin, config.parameters['color_processing_algorithm'])
+
+        # bind per-frame calls once
+        self._get_chunk_data = PySpin.ImagePtr.GetChunkData
+        self._get_frame_id = PySpin.ChunkData.GetFrameID
+        self._get_timestamp = PySpin.ChunkData.GetTimestamp
+
+        self.images_incomplete = 0
+        self.images_wrong_size = 0
+
+    def decode(self, image_result):
+        """Returns the image as a Mono8 array, with its frame ID and timestamp
+
+        Mono8 images are returned as a view of the camera buffer, which is only
+        valid until the image is released.
+
+        Args:
+            image_result (PySpin.ImagePtr): Image from GetNextImage
+
+        Returns:
+            tuple: (image_array, frame_id, timestamp), or None if the image was discarded
+        """
+        if image_result.IsIncomplete():
+            self.images_incomplete += 1
+            if self.images_incomplete == 1 or self.images_incomplete % INCOMPLETE_MESSAGE_INTERVAL == 0:
+                print("\nImage incomplete with image status %d... (%d incomplete images so far)" % (image_result.GetImageStatus(), self.images_incomplete))
+            return None
+
+        if self._read_chunk_data:
+            chunk_data = self._get_chunk_data(image_result)
+            frame_id = self._get_frame_id(chunk_data)
+            timestamp = self._get_timestamp(chunk_data)
+        else:
+            frame_id = timestamp = 0
+
+        if self._source_is_mono8:
+            image_array = np.frombuffer(image_result.GetData(), dtype=np.uint8)
+        else:
+            image_array = image_result.Convert(PySpin.PixelFormat_Mono8, self._color_processing_algorithm).GetNDArray()
+
+        if image_array.size != self._image_size:
+            self.images_wrong_size += 1
+            if self.images_wrong_size == 1 or self.images_wrong_size % INCOMPLETE_MESSAGE_INTERVAL == 0:
+                print("\nImage has %d pixels instead of %d... (%d discarded so far)" % (image_array.size, self._image_size, self.images_wrong_size))
+            return None
+
+        return image_array.reshape(self.image_shape), frame_id, timestamp
+
+    def print(self):
+        # print how many images were discarded, if any
+        if self.images_incomplete > 0:
+            print(f"\nWARNING: {self.images_incomplete} incomplete images were discarded")
+        if self.images_wrong_size > 0:
+            print(f"\nWARNING: {self.images_wrong_size} images of the wrong size were discarded")
 
 
-def acquire_images(acquisition_complete_event, images_queue, camera_system, config, camera_trigger_mode=False):
+def acquire_images(acquisition_complete_event, images_queue, camera_system, config, camera_trigger_mode=False, read_chunk_data=False, timestamps_queue=None, buffer_full_timeout=0, images_acquired_event=None):
     """
     Attempts to grab images from camera stream until stop event is set
 
+    Each image is copied into `images_queue` and the camera buffer is released
+    immediately, so queued images never hold on to Spinnaker's stream buffers.
+
     Args:
         acquisition_complete_event (threading.Event): When set, signals acquisition loop should stop
-        images_queue (collections.deque): Threadsafe image buffer
+        images_queue (RingBuffer): Threadsafe image buffer
         camera_system (CameraSystem) Reference to CameraSystem object
         config (Config): Reference to Config object
+        camera_trigger_mode (bool, optional): If True, each frame is triggered externally
+        read_chunk_data (bool, optional): If True, store each image's frame ID and
+            timestamp (chunk data must be enabled)
+        timestamps_queue (RingBuffer, optional): If given, the frame ID and timestamp of
+            each buffered image are also added here for the timestamp logging thread
+        buffer_full_timeout (float, optional): Seconds to wait for space when `images_queue`
+            is full before dropping the image. If 0, images are dropped immediately.
+        images_acquired_event (threading.Event, optional): Set when this function returns,
+            once no more images will be added to `images_queue` and `timestamps_queue`
 
     Returns:
         bool: True, if successful. False otherwise.
@@ -99,17 +238,29 @@ def acquire_images(acquisition_complete_event, images_queue, camera_system, conf
     waiting_message = waitAnimation("Waiting for images from camera...(press 'Ctrl-C' to end)")
     receiving_message = waitAnimation("Receiving images from camera...(press 'Ctrl-C' to end)")
 
-    if camera_trigger_mode:
-        camera_system.camera.enable_trigger_mode()
-    else:
-        camera_system.camera.disable_trigger_mode()
-
     try:
         result = True
 
+        if camera_trigger_mode:
+            camera_system.camera.enable_trigger_mode()
+        else:
+            camera_system.camera.disable_trigger_mode()
+
         camera_system.camera.begin_acquisition()
 
-        while acquisition_complete_event.is_set() is False:
+        # keep the encoder and other threads from pre-empting image acquisition
+        pin_current_thread(ACQUIRE_THREAD_CPU)
+        raise_current_thread_priority()
+
+        image_decoder = ImageDecoder(camera_system, config, images_queue.frames.shape[1:], read_chunk_data)
+
+        # bind per-frame calls once, outside of the acquisition loop
+        stop_requested = acquisition_complete_event.is_set
+        get_next_image = camera_system.camera.cam.GetNextImage
+        decode = image_decoder.decode
+        images_received = 0
+
+        while stop_requested() is False:
             """
             PySpin.SpinnakerException is thrown when "GetNextImage" times out,
             which is expected when camera is not sending images.
@@ -121,150 +272,325 @@ def acquire_images(acquisition_complete_event, images_queue, camera_system, conf
             indefinitely until the camera sends an image.
             """
             try:
-                image_result = camera_system.camera.cam.GetNextImage(50)
+                image_result = get_next_image(GRAB_TIMEOUT_MS)
 
             except PySpin.SpinnakerException:
-                if acquisition_complete_event.is_set() is False:
+                if stop_requested() is False:
                     waiting_message.print()
                 continue
 
-            if image_result.IsIncomplete():
-                print("Image incomplete with image status %d..." % image_result.GetImageStatus())
+            decoded_image = decode(image_result)
+            if decoded_image is not None:
+                image_array, frame_id, timestamp = decoded_image
+
+                # copy the image (for Mono8, a view of the camera buffer) into a preallocated buffer slot
+                if images_queue.append(image_array, frame_id, timestamp, buffer_full_timeout):
+                    # only images that were buffered are logged, so timestamps match video frames
+                    if timestamps_queue is not None:
+                        timestamps_queue.append(None, frame_id, timestamp)
 
-            else:
-                # put images in threadsafe collection.deque
-                images_queue.append(image_result.Convert(PySpin.PixelFormat_Mono8, PySpin.HQ_LINEAR))
+                elif images_queue.overflow_count == 1:
+                    print("\nWARNING: Image buffer is full. Images are being dropped until saving catches up")
 
-                # all images need to be released before acquisition ends
-                image_result.Release()
+            # all images need to be released before acquisition ends
+            image_result.Release()
 
-            receiving_message.print()
+            # printing to the terminal on every frame would slow down acquisition
+            images_received += 1
+            if images_received % RECEIVING_MESSAGE_INTERVAL == 0:
+                receiving_message.print()
 
         camera_system.camera.end_acquisition()
 
+        image_decoder.print()
+
     except PySpin.SpinnakerException as ex:
         print("Error: %s" % ex)
         result = False
 
+    finally:
+        # the saving threads only stop once the buffers are empty after this is set,
+        # so the video and timestamps always end on the same frame
+        if images_acquired_event is not None:
+            images_acquired_event.set()
+
     return result
 
 
-def get_id_timestamp_from_chunk_data(image):
-    """Extracts FrameID and Timestamp from image chunk data.
-    
+def save_timestamps(acquisition_complete_event, images_acquired_event, timestamps_queue, config):
+    """
+    Saves frame IDs and timestamps to CSV (or binary, see 'timestamps_format')
+
+    Runs in its own thread, so writing the log never delays sending images to the encoder.
+
     Args:
-        image (PySpin.ImagePtr): Image grabbed from a PySpin.CameraPtr.
+        acquisition_complete_event (threading.Event): When set, signals acquisition loop should stop
+        images_acquired_event (threading.Event): When set, no more timestamps will be added,
+            so logging stops once the buffer is empty
+        timestamps_queue (RingBuffer): Threadsafe buffer of frame IDs and timestamps (no images)
+        config (Config): Reference to Config object
+
+    Returns:
+        bool: True, if successful. False otherwise.
     """
     try:
-        chunk_data = image.GetChunkData()
-
-        frame_id = chunk_data.GetFrameID()
-        timestamp = chunk_data.GetTimestamp()
+        with TimestampLog(config.parameters['file_path'], config.parameters['timestamps_format']) as timestamp_log:
+            # bind per-frame calls once, outside of the logging loop
+            wait = timestamps_queue.wait
+            peek_run = timestamps_queue.peek_run
+            pop = timestamps_queue.pop
+            frame_ids = timestamps_queue.frame_ids
+            timestamps = timestamps_queue.timestamps
+            write = timestamp_log.write
+
+            while True:
+                # sleep until the acquisition thread adds a frame
+                if wait(timeout=0.1):
+                    slot, count = peek_run(timestamps_queue.capacity)
+                    for frame_id, timestamp in zip(frame_ids[slot:slot + count], timestamps[slot:slot + count]):
+                        write(frame_id, timestamp)
+                    pop(count)
+
+                elif images_acquired_event.is_set() and len(timestamps_queue) == 0:
+                    break
 
-    except PySpin.SpinnakerException as ex:
+    except OSError as ex:
         print("Error: %s" % ex)
+        print("ERROR: Timestamps could not be saved. Stopping acquisition")
 
-    return frame_id, timestamp
+        # a video without timestamps is of no use, so stop the experiment
+        acquisition_complete_event.set()
+        return False
 
+    if timestamps_queue.overflow_count > 0:
+        print(f"WARNING: {timestamps_queue.overflow_count} timestamps were not saved because the timestamp buffer was full")
+        return False
 
-def save_images(acquisition_complete_event, images_queue, camera_system, config, display_image_queue=None):
+    return True
+
+
+def save_images(acquisition_complete_event, images_acquired_event, images_queue, config, display_image_queue=None):
     """
-    Saves camera images to AVI and timestamps to CSV
+    Saves camera images to MP4
+
+    Timestamps are saved by "save_timestamps" in a separate thread.
 
     Args:
         acquisition_complete_event (threading.Event): When set, signals acquisition loop should stop
-        images_queue (collections.deque): Threadsafe image buffer
-        camera_system (CameraSystem) Reference to CameraSystem object
+        images_acquired_event (threading.Event): When set, no more images will be added,
+            so saving stops once the buffer is empty
+        images_queue (RingBuffer): Threadsafe image buffer
         config (Config): Reference to Config object
-        display_image_queue (collections.deque, optional): A thread-safe image buffer to share images with GUIs
+        display_image_queue (collections.deque, optional): A thread-safe image buffer to share images with GUIs,
+            as (image, acquired, buffered, dropped) tuples
 
     Returns:
         bool: True, if successful. False otherwise.
     """
 
-    video_file_path = config.parameters['file_path'] + ".avi"
-    timestamps_file_path = config.parameters['file_path'] + "_timestamps.csv"
-
-    video_save_framerate = config.parameters['video_save_framerate']
+    video_recorder = None
 
     try:
         result = True
 
-        # get image height/width
-        nodemap = camera_system.camera.cam.GetNodeMap()
-        image_height = PySpin.CIntegerPtr(nodemap.GetNode("Height")).GetValue()
-        image_width = PySpin.CIntegerPtr(nodemap.GetNode("Width")).GetValue()
+        # image height/width is fixed for the whole recording
+        image_height, image_width = images_queue.frames.shape[1:]
 
         # TODO: use context managers for video and csv writers
 
-        # open AVI with unique filename
-        frame_size = (image_width, image_height)
-        video_recorder = cv2.VideoWriter(
-            video_file_path,
-            cv2.CAP_FFMPEG,
-            cv2.VideoWriter_fourcc("M", "J", "P", "G"),
-            video_save_framerate,
-            frame_size,
-            0,
-        )
+        # start ffmpeg encoder (or raw video file)
+        video_recorder = open_video_recorder(config, (image_width, image_height))
 
-        # open log csv
-        logfile = open(timestamps_file_path, "w", newline="")
-        log_writer = csv.writer(logfile)
+        # Pinned only after ffmpeg is started: on Linux, child processes inherit the
+        # CPU affinity of the thread that starts them, which would confine the
+        # (multi-threaded) encoder to this thread's CPU
+        pin_current_thread(SAVE_THREAD_CPU)
 
         # initialize frame counter
         frame_counter = FrameCounter()
 
-        # Video/timestamp saving loop
-        while True:
-            if len(images_queue) > 0:
+        # only every n-th row and column of the images shown in the GUI is copied
+        step = display_step((image_height, image_width))
 
-                # save image
-                new_image = images_queue.popleft()
-                video_recorder.write(new_image.GetNDArray())
+        # bind per-frame calls once, outside of the saving loop
+        wait = images_queue.wait
+        peek_run = images_queue.peek_run
+        pop = images_queue.pop
+        frames = images_queue.frames
+        frame_ids = images_queue.frame_ids
+        write = video_recorder.write
+        update_frame_counter = frame_counter.update
 
-                # save frame ID and timestamp
-                frame_id, timestamp = get_id_timestamp_from_chunk_data(new_image)
-                log_writer.writerow((frame_id, timestamp))
+        # Video saving loop
+        while True:
+            # sleep until the acquisition thread adds an image
+            if wait(timeout=0.1):
 
-                # update frame counter
-                frame_counter.update(len(images_queue), frame_id)
+                # save all waiting images that are next to each other in the buffer with one write
+                slot, count = peek_run(WRITE_BATCH_SIZE)
+                write(frames[slot:slot + count])
 
-                # share data with gui
-                if display_image_queue is None:
-                    # print frame counters if there is no GUI 
-                    if frame_counter.acquired % 100 == 0:
+                # update frame counter (not counting the images being saved as buffered)
+                buffered = len(images_queue) - count
+                for frame_id in frame_ids[slot:slot + count]:
+                    update_frame_counter(buffered, frame_id)
+
+                    # print frame counters if there is no GUI
+                    if display_image_queue is None and frame_counter.acquired % 100 == 0:
                         frame_counter.print()
-                    pass
-                else:
-                    display_image_queue.append({
-                        'image': new_image.GetNDArray(),
-                        'acquired_counter': frame_counter.acquired,
-                        'buffered_counter': frame_counter.buffered,
-                        'dropped_counter': frame_counter.dropped
-                        })
-
-            else:
-                time.sleep(0.01)
-                if acquisition_complete_event.is_set():
-                    break
 
-        # Close log file
-        logfile.close()
+                # share the newest image with gui, as (image, acquired, buffered, dropped)
+                if display_image_queue is not None:
+                    display_image_queue.append((
+                        frames[slot + count - 1, ::step, ::step].copy(),  # the slot is reused once popped
+                        frame_counter.acquired,
+                        frame_counter.buffered,
+                        frame_counter.dropped,
+                        ))
 
-        # Close AVI file
+                # hand the slots back to the acquisition thread
+                pop(count)
+
+            elif images_acquired_event.is_set() and len(images_queue) == 0:
+                break
+
+        # Close video file
         video_recorder.release()
 
         print(f'\nSaved frames: {frame_counter.acquired}  |  Dropped frames: {frame_counter.dropped}')
+        if images_queue.overflow_count > 0:
+            print(f"WARNING: {images_queue.overflow_count} frames were dropped because the image buffer was full")
         print(f"Saved to {config.parameters['data_directory']}")
 
-    except PySpin.SpinnakerException as ex:
+    except (PySpin.SpinnakerException, OSError) as ex:  # OSError includes VideoWriterError
         print("Error: %s" % ex)
+        print("ERROR: Video could not be saved. Stopping acquisition")
+
+        # images would only pile up in the buffer, so stop the experiment
+        acquisition_complete_event.set()
+
+        if video_recorder is not None:
+            try:
+                video_recorder.release()
+            except OSError:
+                pass  # already reported above
+
         return False
 
     return result
 
 
+def open_video_recorder(config, frame_size):
+    """Opens the video writer selected by the video parameters in the config file
+
+    Args:
+        config (Config): Reference to Config object
+        frame_size (tuple): Image (width, height) in pixels
+
+    Returns:
+        VideoWriter or RawVideoWriter: The video writer
+    """
+    return open_video_writer(
+        config.parameters['file_path'],
+        frame_size,
+        config.parameters['video_save_framerate'],
+        codec=config.parameters['video_codec'],
+        preset=config.parameters['video_preset'],
+        crf=config.parameters['video_crf'],
+        threads=config.parameters['video_encoder_threads'],
+        )
+
+
+def acquire_and_save_images(acquisition_complete_event, camera_system, config):
+    """
+    Grabs images from camera stream and saves each one before grabbing the next, until stop event is set
+
+    Single-threaded alternative to "acquire_images" + "save_images" + "save_timestamps",
+    used by "run_experiment_cli" when 'threaded_io' is false. There is no image buffer
+    between threads: Mono8 images are written to the video straight from the camera
+    buffer. If saving falls behind, images queue up in the camera's stream buffers
+    (see 'stream_buffer_count') and are dropped by the camera driver once those are full.
+
+    Args:
+        acquisition_complete_event (threading.Event): When set, signals acquisition loop should stop
+        camera_system (CameraSystem) Reference to CameraSystem object
+        config (Config): Reference to Config object
+
+    Returns:
+        bool: True, if successful. False otherwise.
+    """
+    waiting_message = waitAnimation("Waiting for images from camera...(press 'Ctrl-C' to end)")
+
+    try:
+        result = True
+
+        camera_system.camera.enable_trigger_mode()
+
+        image_shape = camera_system.camera.get_image_shape()
+        image_height, image_width = image_shape
+
+        with open_video_recorder(config, (image_width, image_height)) as video_recorder, \
+                TimestampLog(config.parameters['file_path'], config.parameters['timestamps_format']) as timestamp_log:
+
+            camera_system.camera.begin_acquisition()
+
+            # keep the encoder and other threads from pre-empting image acquisition
+            pin_current_thread(ACQUIRE_THREAD_CPU)
+            raise_current_thread_priority()
+
+            image_decoder = ImageDecoder(camera_system, config, image_shape)
+            frame_counter = FrameCounter()
+
+            # bind per-frame calls once, outside of the acquisition loop
+            stop_requested = acquisition_complete_event.is_set
+            get_next_image = camera_system.camera.cam.GetNextImage
+            decode = image_decoder.decode
+            write_video = video_recorder.write
+            write_timestamp = timestamp_log.write
+            update_frame_counter = frame_counter.update
+
+            try:
+                while stop_requested() is False:
+                    # GetNextImage times out when the camera is not sending images (see "acquire_images")
+                    try:
+                        image_result = get_next_image(GRAB_TIMEOUT_MS)
+
+                    except PySpin.SpinnakerException:
+                        if stop_requested() is False:
+                            waiting_message.print()
+                        continue
+
+                    try:
+                        decoded_image = decode(image_result)
+                        if decoded_image is not None:
+                            image_array, frame_id, timestamp = decoded_image
+
+                            # for Mono8, a view of the camera buffer, written to the video without any copy
+                            write_video(image_array)
+                            write_timestamp(frame_id, timestamp)
+
+                            update_frame_counter(0, frame_id)
+                            if frame_counter.acquired % 100 == 0:
+                                frame_counter.print()
+
+                    finally:
+                        # all images need to be released before acquisition ends, even if saving failed
+                        image_result.Release()
+
+            finally:
+                camera_system.camera.end_acquisition()
+
+        print(f'\nSaved frames: {frame_counter.acquired}  |  Dropped frames: {frame_counter.dropped}')
+        image_decoder.print()
+        print(f"Saved to {config.parameters['data_directory']}")
+
+    except (PySpin.SpinnakerException, OSError) as ex:  # OSError includes VideoWriterError
+        print("Error: %s" % ex)
+        result = False
+
+    return result
+
+
 class AcquireGui:
     """A tkinter GUI for displaying video and frame counts during acquisition
     
@@ -293,11 +619,13 @@ class AcquireGui:
         self.video = tk.Label(self.video_frame)
         self.video.grid(row=0, column=0)
 
-        # temporay placeholder for the video feed
-        img = Image.fromarray(np.zeros((200, 300)))
-        imgtk = ImageTk.PhotoImage(image=img)
-        self.video.image = imgtk
-        self.video.configure(image=imgtk)
+        # The video feed is drawn into a single PhotoImage of the (fixed) image size,
+        # instead of creating a new one for every frame. It starts out black.
+        image_height, image_width = camera_system.camera.get_image_shape()
+        step = display_step((image_height, image_width))
+        display_size = (-(-image_width // step), -(-image_height // step))  # as sliced by save_images
+        self.video_image = ImageTk.PhotoImage(image=Image.new('L', display_size))
+        self.video.configure(image=self.video_image)
 
         # initialize frame counters
         self.acquired_frame_counter_val = tk.StringVar()
@@ -345,19 +673,23 @@ class AcquireGui:
 
     def update_video(self):
         """Update video image, if possible."""
-        if len(self.display_image_queue) > 0:
-            display_data = self.display_image_queue.popleft()
+        # acquisition was stopped by another thread (e.g. the video could not be saved)
+        if self.acquisition_complete_event.is_set():
+            self.gui.destroy()
+            return
 
-            # update image
-            img = Image.fromarray(display_data['image'])
-            imgtk = ImageTk.PhotoImage(image = img)
-            self.video.configure(image=imgtk)
-            self.video.image = imgtk
+        try:
+            image, acquired_counter, buffered_counter, dropped_counter = self.display_image_queue.popleft()
+        except IndexError:
+            pass  # no new image yet
+        else:
+            # update image (the display image is C-contiguous Mono8, so PIL can use its buffer directly)
+            self.video_image.paste(Image.frombuffer('L', (image.shape[1], image.shape[0]), image, 'raw', 'L', 0, 1))
 
             # update counters
-            self.acquired_frame_counter_val.set(str(display_data['acquired_counter']))
-            self.buffered_frame_counter_val.set(str(display_data['buffered_counter']))
-            self.dropped_frame_counter_val.set(str(display_data['dropped_counter']))
+            self.acquired_frame_counter_val.set(str(acquired_counter))
+            self.buffered_frame_counter_val.set(str(buffered_counter))
+            self.dropped_frame_counter_val.set(str(dropped_counter))
 
         # This creates a feedback loop causing "update_video" to be called at a fixed interval
         # limiting update framerate to 50Hz for performance
@@ -389,18 +721,24 @@ def run_experiment_gui(camera_system, config):
         camera_system (CameraSystem): Reference to CameraSystem object
         config (Config): Reference to Config object
 
-    This function starts three threads: one for acquiring images from the camera,
-    one for saving the acquired images to disk, and one for displaying the video
-    feed and frame counters in a GUI.
+    This function starts four threads: one for acquiring images from the camera,
+    one for saving the acquired images to video, one for saving their timestamps,
+    and one for displaying the video feed and frame counters in a GUI.
 
-    It uses a deque as a threadsafe image buffer, and a threading.Event to
+    It uses a RingBuffer as a threadsafe image buffer, and a threading.Event to
     signal when acquisition is complete.
     """
     if camera_system.camera.enable_chunk_data() is False:
         print("Unable to enable chunk data")
 
-    # infinitely large threadsafe image buffer
-    images_queue = deque([])
+    if camera_system.camera.configure_stream_buffer(config.parameters['stream_buffer_count']) is False:
+        print("Unable to configure stream buffer")
+
+    # bounded threadsafe image buffer, preallocated for the (fixed) image size
+    images_queue = RingBuffer(config.parameters['image_buffer_size'], camera_system.camera.get_image_shape())
+
+    # frame IDs and timestamps are logged by their own thread
+    timestamps_queue = RingBuffer(TIMESTAMP_BUFFER_SIZE)
 
     # thread-safe queue to share data with GUIs
     display_image_queue = deque([], maxlen=1)
@@ -408,15 +746,28 @@ def run_experiment_gui(camera_system, config):
     # Create an thread event to signal when acquisition is complete
     acquisition_complete_event = threading.Event()
 
+    # ...and one set by the acquisition thread once it has added its last image
+    images_acquired_event = threading.Event()
+
     # Create threads for acquiring and saving images
     acquire_images_thread = threading.Thread(
         target=acquire_images,
         args=[acquisition_complete_event, images_queue, camera_system, config],
-        kwargs={'camera_trigger_mode':True}
+        kwargs={
+            'camera_trigger_mode':True,
+            'read_chunk_data':True,
+            'timestamps_queue':timestamps_queue,
+            'buffer_full_timeout':BUFFER_FULL_TIMEOUT,
+            'images_acquired_event':images_acquired_event,
+        }
+    )
+    save_timestamps_thread = threading.Thread(
+        target=save_timestamps,
+        args=[acquisition_complete_event, images_acquired_event, timestamps_queue, config],
     )
     save_images_thread = threading.Thread(
         target=save_images,
-        args=[acquisition_complete_event, images_queue, camera_system, config],
+        args=[acquisition_complete_event, images_acquired_event, images_queue, config],
         kwargs={'display_image_queue':display_image_queue}
     )
     acquisition_gui_thread = threading.Thread(
@@ -424,15 +775,19 @@ def run_experiment_gui(camera_system, config):
         args=[acquisition_complete_event, display_image_queue, camera_system],
     )
     acquire_images_thread.start()
+    save_timestamps_thread.start()
     save_images_thread.start()
     acquisition_gui_thread.start()
 
     # close threads gracefully
-    while acquire_images_thread.is_alive() or save_images_thread.is_alive() or acquisition_gui_thread.is_alive():
+    while acquire_images_thread.is_alive() or save_timestamps_thread.is_alive() or save_images_thread.is_alive() or acquisition_gui_thread.is_alive():
         try:
             if acquire_images_thread.is_alive():
                 acquire_images_thread.join(0.5)
 
+            if save_timestamps_thread.is_alive():
+                save_timestamps_thread.join(0.5)
+
             if save_images_thread.is_alive():
                 save_images_thread.join(0.5)
 
@@ -459,44 +814,72 @@ def run_experiment_cli(camera_system, config):
         camera_system (CameraSystem): Reference to CameraSystem object
         config (Config): Reference to Config object
 
-    This function starts two threads: one for acquiring images from the camera
-    and one for saving the acquired images to disk.
+    This function starts three threads: one for acquiring images from the camera,
+    one for saving the acquired images to video, and one for saving their timestamps.
+    If 'threaded_io' is false, a single thread acquires and saves each image instead.
 
-    It uses a deque as a threadsafe image buffer, and a threading.Event to
+    It uses a RingBuffer as a threadsafe image buffer, and a threading.Event to
     signal when acquisition is complete.
     """
 
     if camera_system.camera.enable_chunk_data() is False:
         print("Unable to enable chunk data")
 
-    # infinitely large threadsafe image buffer
-    images_queue = deque([])
+    if camera_system.camera.configure_stream_buffer(config.parameters['stream_buffer_count']) is False:
+        print("Unable to configure stream buffer")
 
     # Create an thread event to signal when acquisition is complete
     acquisition_complete_event = threading.Event()
 
-    # Create threads for acquiring and saving images
-    acquire_images_thread = threading.Thread(
-        target=acquire_images,
-        args=[acquisition_complete_event, images_queue, camera_system, config],
-        kwargs={'camera_trigger_mode':True}
-    )
-    save_images_thread = threading.Thread(
-        target=save_images,
-        args=[acquisition_complete_event, images_queue, camera_system, config],
-    )
+    if config.parameters['threaded_io']:
+        # ...and one set by the acquisition thread once it has added its last image
+        images_acquired_event = threading.Event()
+
+        # bounded threadsafe image buffer, preallocated for the (fixed) image size
+        images_queue = RingBuffer(config.parameters['image_buffer_size'], camera_system.camera.get_image_shape())
+
+        # frame IDs and timestamps are logged by their own thread
+        timestamps_queue = RingBuffer(TIMESTAMP_BUFFER_SIZE)
+
+        # Create threads for acquiring and saving images
+        acquire_images_thread = threading.Thread(
+            target=acquire_images,
+            args=[acquisition_complete_event, images_queue, camera_system, config],
+            kwargs={
+                'camera_trigger_mode':True,
+                'read_chunk_data':True,
+                'timestamps_queue':timestamps_queue,
+                'buffer_full_timeout':BUFFER_FULL_TIMEOUT,
+                'images_acquired_event':images_acquired_event,
+            }
+        )
+        save_timestamps_thread = threading.Thread(
+            target=save_timestamps,
+            args=[acquisition_complete_event, images_acquired_event, timestamps_queue, config],
+        )
+        save_images_thread = threading.Thread(
+            target=save_images,
+            args=[acquisition_complete_event, images_acquired_event, images_queue, config],
+        )
+        threads = [acquire_images_thread, save_timestamps_thread, save_images_thread]
 
-    acquire_images_thread.start()
-    save_images_thread.start()
+    else:
+        # Create a single thread for acquiring and saving images
+        acquire_and_save_images_thread = threading.Thread(
+            target=acquire_and_save_images,
+            args=[acquisition_complete_event, camera_system, config],
+        )
+        threads = [acquire_and_save_images_thread]
+
+    for thread in threads:
+        thread.start()
 
     # close threads gracefully
-    while acquire_images_thread.is_alive() or save_images_thread.is_alive():
+    while any(thread.is_alive() for thread in threads):
         try:
-            if acquire_images_thread.is_alive():
-                acquire_images_thread.join(0.5)
-
-            if save_images_thread.is_alive():
-                save_images_thread.join(0.5)
+            for thread in threads:
+                if thread.is_alive():
+                    thread.join(0.5)
 
         except KeyboardInterrupt:
             acquisition_complete_event.set()
@@ -1,5 +1,27 @@
+import math
+import threading
 import PySpin
 
+
+def _snap_to_increment(value, node_attributes):
+    """Returns the valid node value closest to a given value
+
+    Valid values are Min, Min + Increment, ... up to Max.
+
+    Args:
+        value (int or float): Desired value
+        node_attributes (dict): Node attributes from "Camera.get_image_settings"
+
+    Returns:
+        int: The closest valid value
+    """
+    minimum, maximum, increment = node_attributes['Min'], node_attributes['Max'], node_attributes['Increment']
+    largest = maximum - (maximum - minimum) % increment  # largest valid value
+
+    snapped = minimum + math.floor((value - minimum) / increment + 0.5) * increment
+    return max(minimum, min(largest, snapped))
+
+
 class CameraSystem:
     """Interface with Flir camera systems.
     
@@ -28,6 +50,7 @@ class CameraSystem:
         self.system = PySpin.System.GetInstance()
         self.camera_list = self.system.GetCameras()
         self.num_cameras = self.camera_list.GetSize()
+        self._cam_info_cache = {}  # {(unique camera ID, keys): cam_info}, filled by get_cam_info
 
         cam = self._select_camera()
         if cam is not None:
@@ -50,6 +73,7 @@ class CameraSystem:
         if self.camera is not None:
             self.camera.close()
 
+        # Spinnaker can only release the system once no camera references are left
         self.camera_list.Clear()
         self.system.ReleaseInstance()
 
@@ -69,42 +93,60 @@ class CameraSystem:
 
         else:
             print_format = lambda a : str(a).center(30, ' ')
-            print_node_keys = ['DeviceModelName', 'DeviceSerialNumber']
-            valid_cam_numbers = []
+            print_node_keys = ('DeviceModelName', 'DeviceSerialNumber')
+            valid_cam_numbers = range(self.num_cameras)
 
-            print(*map(print_format, ['Camera'] + print_node_keys), sep = '|')
+            print(*map(print_format, ('Camera',) + print_node_keys), sep = '|')
             for i,cam in enumerate(self.camera_list):
-                valid_cam_numbers.append(i)
-                cam_info = get_cam_info(cam)
+                cam_info = self.get_cam_info(cam, print_node_keys)
                 print_line = [i] + [cam_info.get(key) for key in print_node_keys]
                 print(*map(print_format, print_line), sep = '|')
 
             # user selects camera
             selected_cam = None
             while selected_cam not in valid_cam_numbers:
-                selected_cam = int(input(f"Select a camera from {valid_cam_numbers}: "))
+                selected_cam = int(input(f"Select a camera from {list(valid_cam_numbers)}: "))
 
             return self.camera_list[selected_cam]
 
-    def get_cam_info(self, cam):
+    def get_cam_info(self, cam, keys=None):
         """Retrieves information about the camera.
 
+        The information is read from the camera once and reused by later calls.
+
         Args:
             cam (PySpin.CameraPtr): The camera to retrieve information about.
+            keys (tuple, optional): Names of the device information nodes to read
+                (e.g. 'DeviceSerialNumber'). If None, all of them are read.
 
         Returns:
             dict: A dictionary of camera information.
         """
+        cache_key = (cam.GetUniqueID(), keys)
+        if cache_key in self._cam_info_cache:
+            return self._cam_info_cache[cache_key]
+
         nodemap = cam.GetTLDeviceNodeMap()
-        node_device_information = PySpin.CCategoryPtr(nodemap.GetNode('DeviceInformation'))
+        value_ptr, is_readable = PySpin.CValuePtr, PySpin.IsReadable  # bound once for the loops
+
+        cam_info = {}
+        if keys is not None:
+            # look up only the requested nodes by name
+            for key in keys:
+                node = nodemap.GetNode(key)
+                cam_info[key] = value_ptr(node).ToString() if node is not None and is_readable(node) else 'Node not readable'
 
+            self._cam_info_cache[cache_key] = cam_info
+            return cam_info
+
+        node_device_information = PySpin.CCategoryPtr(nodemap.GetNode('DeviceInformation'))
         if PySpin.IsAvailable(node_device_information) and PySpin.IsReadable(node_device_information):
             features = node_device_information.GetFeatures()
-            cam_info = {}
             for feature in features:
-                node_feature = PySpin.CValuePtr(feature)
-                cam_info[node_feature.GetName()] = node_feature.ToString() if PySpin.IsReadable(node_feature) else 'Node not readable'
+                node_feature = value_ptr(feature)
+                cam_info[node_feature.GetName()] = node_feature.ToString() if is_readable(node_feature) else 'Node not readable'
 
+        self._cam_info_cache[cache_key] = cam_info
         return cam_info
 
 
@@ -113,6 +155,9 @@ class CameraSystem:
 
         This class provides a partial wrapper around the PySpin camera object,
 
+        The camera is initialized in a background thread, so other startup work can
+        run meanwhile. The first use of `cam` waits for initialization to finish.
+
         Attributes:
             cam (PySpin.CameraPtr): An interface with the camera.
 
@@ -124,14 +169,33 @@ class CameraSystem:
             Args:
                 cam (PySpin.CameraPtr): An interface with the camera.
             """
-            self.cam = cam
+            self._cam = cam
             self._camera_acquiring_flag = False
+            self._chunk_nodes = None  # cached by _set_chunk_data_enabled
+            self._integer_nodes = {}  # cached by _get_integer_node
+            self._offset_limits = {}  # cached by get_image_settings
 
+            self._init_thread = None
             if cam is not None:
-                try:
-                    self.cam.Init()
-                except PySpin.SpinnakerException as ex:
-                    print("Error: %s" % ex)
+                self._init_thread = threading.Thread(target=self._init_camera)
+                self._init_thread.start()
+
+        @property
+        def cam(self):
+            """PySpin.CameraPtr: An interface with the camera, once it is initialized."""
+            init_thread = self._init_thread
+            if init_thread is not None:
+                init_thread.join()
+                self._init_thread = None
+
+            return self._cam
+
+        def _init_camera(self):
+            """Initializes the camera. Runs in a background thread started by __init__."""
+            try:
+                self._cam.Init()
+            except PySpin.SpinnakerException as ex:
+                print("Error: %s" % ex)
 
         def __str__(self):
             """Returns a string representation of the Camera object"""
@@ -141,7 +205,11 @@ class CameraSystem:
             """Ends connection to the camera."""
             self.end_acquisition()
             self.cam.DeInit()
-            del self.cam
+
+            # release the camera (and cached nodes) now, so CameraSystem.close can clear the camera list
+            self._integer_nodes.clear()
+            self._chunk_nodes = None
+            self._cam = None
 
         def _get_node_info(self, node):
             """Returns information about a given PySpin node as a string, if applicable.
@@ -152,7 +220,8 @@ class CameraSystem:
             Returns:
                 str: A string representation of the node information, or None if not applicable.
             """
-            if node is not None and PySpin.IsImplemented(node) and PySpin.IsReadable(node):
+            # IsReadable is False for nodes that are not implemented, so it is the only check needed
+            if node is not None and PySpin.IsReadable(node):
                 return PySpin.CValuePtr(node).ToString()
             else:
                 return None
@@ -175,6 +244,22 @@ class CameraSystem:
                 except PySpin.SpinnakerException as ex:
                     print("Error: %s" % ex)
 
+        def _get_integer_node(self, node):
+            """Returns the integer node with a given name, looked up once and reused by later calls.
+
+            Args:
+                node (str): Name of the node (e.g. 'Width', 'OffsetX')
+
+            Returns:
+                PySpin.CIntegerPtr: The node
+            """
+            integer_node = self._integer_nodes.get(node)
+            if integer_node is None:
+                integer_node = PySpin.CIntegerPtr(self.cam.GetNodeMap().GetNode(node))
+                self._integer_nodes[node] = integer_node
+
+            return integer_node
+
         def get_image_settings(self, node):
             """Get attributes from image nodes
 
@@ -186,84 +271,156 @@ class CameraSystem:
                 dict: A dict for node attributes ('Value', 'Min', 'Max', 'Increment')
 
             """
-            if getattr(self.cam, node).GetAccessMode() in (PySpin.RW, PySpin.RO):
-                node_attributes = {
-                    'Value': getattr(self.cam, node).GetValue(),
-                    'Min': getattr(self.cam, node).GetMin(),
-                    'Max': getattr(self.cam, node).GetMax(),
-                    'Increment': getattr(self.cam, node).GetInc()
-                    }
+            integer_node = self._get_integer_node(node)
+
+            if integer_node.GetAccessMode() in (PySpin.RW, PySpin.RO):
+                # The offset limits only depend on Width and Height, which are never changed
+                # here, so they are read once. Width and Height limits change with the offsets.
+                limits = self._offset_limits.get(node)
+                if limits is None:
+                    limits = {
+                        'Min': integer_node.GetMin(),
+                        'Max': integer_node.GetMax(),
+                        'Increment': integer_node.GetInc()
+                        }
+                    if node in ('OffsetX', 'OffsetY'):
+                        self._offset_limits[node] = limits
+
+                node_attributes = {'Value': integer_node.GetValue(), **limits}
 
                 return node_attributes
             else:
                 return None
 
+        def get_image_shape(self):
+            """Returns the image (height, width) in pixels"""
+            return (self._get_integer_node('Height').GetValue(), self._get_integer_node('Width').GetValue())
+
         def update_image_offset(self, offsetx_delta, offsety_delta):
             """Update image offset relative to current offset to the closest viable offset
 
-            Checks desired offset against valid offset values and selects the closest values
+            Snaps the desired offset to the closest valid offset values. Acquisition is
+            only restarted if the offset actually changes.
 
             Args:
                 offsetx_delta (int or float): Number of pixels to change OffsetX
                 offsety_delta (int or float): Number of pixels to change OffsetY
 
             """
-            self.end_acquisition()  # image settings cannot be changed while acquiring
-
-            nodemap = self.cam.GetNodeMap()
-
-            image_settings_nodes = ['Width', 'Height', 'OffsetX', 'OffsetY']
-            image_settings = {node: self.get_image_settings(node) for node in image_settings_nodes}
+            # offsets can be read while acquiring
+            image_settings = {node: self.get_image_settings(node) for node in ('OffsetX', 'OffsetY')}
 
             desired_offsetx = image_settings['OffsetX']['Value'] + offsetx_delta
             desired_offsety = image_settings['OffsetY']['Value'] + offsety_delta
 
+            new_offsetx = _snap_to_increment(desired_offsetx, image_settings['OffsetX'])
+            new_offsety = _snap_to_increment(desired_offsety, image_settings['OffsetY'])
 
-            valid_offsetx_values = [i for i in range(
-                                        image_settings['OffsetX']['Min'],
-                                        image_settings['OffsetX']['Max'],
-                                        image_settings['OffsetX']['Increment'])
-                                    ]
-
-            valid_offsety_values = [i for i in range(
-                                        image_settings['OffsetY']['Min'],
-                                        image_settings['OffsetY']['Max'],
-                                        image_settings['OffsetY']['Increment'])
-                                    ]
+            offsetx_changed = new_offsetx != image_settings['OffsetX']['Value']
+            offsety_changed = new_offsety != image_settings['OffsetY']['Value']
+            if not offsetx_changed and not offsety_changed:
+                return  # e.g. a click near the center of the image
 
-            new_offsetx = min(valid_offsetx_values, key=lambda x: abs(x-desired_offsetx))
-            new_offsety = min(valid_offsety_values, key=lambda y: abs(y-desired_offsety))
+            self.end_acquisition()  # image settings cannot be changed while acquiring
 
-            node = PySpin.CIntegerPtr(nodemap.GetNode('OffsetX'))
-            if PySpin.IsAvailable(node) and PySpin.IsWritable(node):
+            node = self._get_integer_node('OffsetX')
+            if offsetx_changed and PySpin.IsAvailable(node) and PySpin.IsWritable(node):
                 node.SetValue(new_offsetx)
 
-            node = PySpin.CIntegerPtr(nodemap.GetNode('OffsetY'))
-            if PySpin.IsAvailable(node) and PySpin.IsWritable(node):
+            node = self._get_integer_node('OffsetY')
+            if offsety_changed and PySpin.IsAvailable(node) and PySpin.IsWritable(node):
                 node.SetValue(new_offsety)
 
             self.begin_acquisition()
 
+        def configure_stream_buffer(self, buffer_count):
+            """Sets how many images Spinnaker buffers on the host and retrieves them oldest first
+
+            A large buffer absorbs short stalls in saving without dropping frames.
+            Must be called while the camera is not acquiring.
+
+            Args:
+                buffer_count (int): Number of stream buffers (clamped to the camera's maximum)
+
+            Returns:
+                bool: True, if successful. False otherwise.
+            """
+            nodemap = self.cam.GetTLStreamNodeMap()
+
+            try:
+                buffer_count_mode = PySpin.CEnumerationPtr(nodemap.GetNode("StreamBufferCountMode"))
+                if not PySpin.IsAvailable(buffer_count_mode) or not PySpin.IsWritable(buffer_count_mode):
+                    print("Unable to set stream buffer count mode. Aborting...\n")
+                    return False
+                buffer_count_mode.SetIntValue(buffer_count_mode.GetEntryByName("Manual").GetValue())
+
+                buffer_count_manual = PySpin.CIntegerPtr(nodemap.GetNode("StreamBufferCountManual"))
+                if not PySpin.IsAvailable(buffer_count_manual) or not PySpin.IsWritable(buffer_count_manual):
+                    print("Unable to set stream buffer count. Aborting...\n")
+                    return False
+                buffer_count_manual.SetValue(min(buffer_count, buffer_count_manual.GetMax()))
+
+                # keep images in order; NewestOnly would silently discard a backlog
+                buffer_handling_mode = PySpin.CEnumerationPtr(nodemap.GetNode("StreamBufferHandlingMode"))
+                if not PySpin.IsAvailable(buffer_handling_mode) or not PySpin.IsWritable(buffer_handling_mode):
+                    print("Unable to set stream buffer handling mode. Aborting...\n")
+                    return False
+                buffer_handling_mode.SetIntValue(buffer_handling_mode.GetEntryByName("OldestFirst").GetValue())
+
+            except PySpin.SpinnakerException as ex:
+                print("Error: %s" % ex)
+                return False
+
+            return True
+
+        def get_pixel_format(self):
+            """Returns the current pixel format (e.g. PySpin.PixelFormat_Mono8)"""
+            return self.cam.PixelFormat.GetValue()
+
+        def set_pixel_format_mono8(self):
+            """Makes the camera send Mono8 images, so they don't need to be converted
+
+            Color cameras convert to Mono8 on the camera. Must be called while the
+            camera is not acquiring.
+
+            Returns:
+                bool: True, if the pixel format is Mono8. False otherwise.
+            """
+            try:
+                if self.cam.PixelFormat.GetValue() == PySpin.PixelFormat_Mono8:
+                    return True
+
+                if self.cam.PixelFormat.GetAccessMode() != PySpin.RW:
+                    return False
+
+                self.cam.PixelFormat.SetValue(PySpin.PixelFormat_Mono8)
+
+            except PySpin.SpinnakerException as ex:
+                print("Error: %s" % ex)
+                return False
+
+            return True
+
         def enable_trigger_mode(self):
             self.cam.TriggerMode.SetValue(PySpin.TriggerMode_On)
 
         def disable_trigger_mode(self):
             self.cam.TriggerMode.SetValue(PySpin.TriggerMode_Off)
 
-        def enable_chunk_data(self):
-            """Enable all chunk data nodes
+        def _set_chunk_data_enabled(self, enabled):
+            """Enables or disables all chunk data nodes
 
-            Refer to the PySpin ChunkData.py example for detailed explanation
-            """
-            nodemap = self.cam.GetNodeMap()
+            The chunk selector, its readable entries and the chunk enable node are
+            looked up once and reused by later calls.
 
-            try:
-                result = True
+            Args:
+                enabled (bool): If True, enable chunk data nodes. Otherwise, disable them.
 
-                # Enable Chunk Mode
-                chunk_mode_active = PySpin.CBooleanPtr(nodemap.GetNode("ChunkModeActive"))
-                if PySpin.IsAvailable(chunk_mode_active) and PySpin.IsWritable(chunk_mode_active):
-                    chunk_mode_active.SetValue(True)
+            Returns:
+                bool: True, if successful. False otherwise.
+            """
+            if self._chunk_nodes is None:
+                nodemap = self.cam.GetNodeMap()
 
                 # Enumerate "ChunkSelector", which determines which chunk is being toggled
                 chunk_selector = PySpin.CEnumerationPtr(nodemap.GetNode("ChunkSelector"))
@@ -271,67 +428,75 @@ class CameraSystem:
                     print("Unable to retrieve chunk selector. Aborting...\n")
                     return False
 
-                entries = [
-                    PySpin.CEnumEntryPtr(chunk_selector_entry)
-                    for chunk_selector_entry in chunk_selector.GetEntries()
-                ]
+                chunk_selector_values = []
+                enum_entry_ptr, is_available, is_readable = PySpin.CEnumEntryPtr, PySpin.IsAvailable, PySpin.IsReadable
+                for chunk_selector_entry in chunk_selector.GetEntries():
+                    chunk_selector_entry = enum_entry_ptr(chunk_selector_entry)
+                    if is_available(chunk_selector_entry) and is_readable(chunk_selector_entry):
+                        chunk_selector_values.append(chunk_selector_entry.GetValue())
 
-                for chunk_selector_entry in entries:
-                    if not PySpin.IsAvailable(chunk_selector_entry) or not PySpin.IsReadable(chunk_selector_entry):
-                        continue
+                # "ChunkEnable" reflects whichever chunk is selected
+                chunk_enable = PySpin.CBooleanPtr(nodemap.GetNode("ChunkEnable"))
 
-                    chunk_selector.SetIntValue(chunk_selector_entry.GetValue())
-                    chunk_enable = PySpin.CBooleanPtr(nodemap.GetNode("ChunkEnable"))
+                self._chunk_nodes = (chunk_selector, chunk_selector_values, chunk_enable)
 
-                    if not PySpin.IsAvailable(chunk_enable):
-                        result = False
-                    elif chunk_enable.GetValue() is True:
-                        continue
-                    elif PySpin.IsWritable(chunk_enable):
-                        chunk_enable.SetValue(True)
-                    else:
-                        result = False
+            chunk_selector, chunk_selector_values, chunk_enable = self._chunk_nodes
 
-            except PySpin.SpinnakerException as ex:
-                print("Error: %s" % ex)
-                result = False
+            # bound once for the loop
+            set_chunk_selector = chunk_selector.SetIntValue
+            is_available, is_writable = PySpin.IsAvailable, PySpin.IsWritable
 
-        def disable_chunk_data(self):
-            """Disable all chunk data nodes
+            result = True
+            for chunk_selector_value in chunk_selector_values:
+                set_chunk_selector(chunk_selector_value)
+
+                if not is_available(chunk_enable):
+                    result = False
+                elif chunk_enable.GetValue() is enabled:
+                    continue
+                elif is_writable(chunk_enable):
+                    chunk_enable.SetValue(enabled)
+                else:
+                    result = False
+
+            return result
+
+        def enable_chunk_data(self):
+            """Enable all chunk data nodes
 
             Refer to the PySpin ChunkData.py example for detailed explanation
+
+            Returns:
+                bool: True, if successful. False otherwise.
             """
             nodemap = self.cam.GetNodeMap()
 
             try:
-                result = True
+                # Enable Chunk Mode
+                chunk_mode_active = PySpin.CBooleanPtr(nodemap.GetNode("ChunkModeActive"))
+                if PySpin.IsAvailable(chunk_mode_active) and PySpin.IsWritable(chunk_mode_active):
+                    chunk_mode_active.SetValue(True)
 
-                # Enumerate "ChunkSelector", which determines which chunk is being toggled
-                chunk_selector = PySpin.CEnumerationPtr(nodemap.GetNode("ChunkSelector"))
-                if not PySpin.IsAvailable(chunk_selector) or not PySpin.IsReadable(chunk_selector):
-                    print("Unable to retrieve chunk selector. Aborting...\n")
-                    return False
+                result = self._set_chunk_data_enabled(True)
 
-                entries = [
-                    PySpin.CEnumEntryPtr(chunk_selector_entry)
-                    for chunk_selector_entry in chunk_selector.GetEntries()
-                ]
+            except PySpin.SpinnakerException as ex:
+                print("Error: %s" % ex)
+                result = False
+
+            return result
+
+        def disable_chunk_data(self):
+            """Disable all chunk data nodes
 
-                for chunk_selector_entry in entries:
-                    if not PySpin.IsAvailable(chunk_selector_entry) or not PySpin.IsReadable(chunk_selector_entry):
-                        continue
+            Refer to the PySpin ChunkData.py example for detailed explanation
 
-                    chunk_selector.SetIntValue(chunk_selector_entry.GetValue())
-                    chunk_enable = PySpin.CBooleanPtr(nodemap.GetNode("ChunkEnable"))
+            Returns:
+                bool: True, if successful. False otherwise.
+            """
+            nodemap = self.cam.GetNodeMap()
 
-                    if not PySpin.IsAvailable(chunk_enable):
-                        result = False
-                    elif chunk_enable.GetValue() is False:
-                        continue
-                    elif PySpin.IsWritable(chunk_enable):
-                        chunk_enable.SetValue(False)
-                    else:
-                        result = False
+            try:
+                result = self._set_chunk_data_enabled(False)
 
                 chunk_mode_active = PySpin.CBooleanPtr(nodemap.GetNode("ChunkModeActive"))
                 if PySpin.IsAvailable(chunk_mode_active) and PySpin.IsWritable(chunk_mode_active):
@@ -340,3 +505,5 @@ class CameraSystem:
             except PySpin.SpinnakerException as ex:
                 print("Error: %s" % ex)
                 result = False
+
+            return result
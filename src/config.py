@@ -1,5 +1,4 @@
 import os
-import tomlkit
 
 
 class Config:
@@ -24,8 +23,29 @@ class Config:
     Methods:
         _load_config_file: Loads the configuration file from disk.
         _create_config_file: Creates a new configuration file with default values.
+        _add_missing_parameters: Adds defaults for optional parameters missing from the file.
         _validate_config: Checks the configuration parameters for validity.
     """
+    # Optional parameters as {name: (default value, comment)}. Config files created
+    # before a parameter was added are filled in with its default value.
+    OPTIONAL_PARAMETERS = {
+        "timestamps_format": ("csv", "'csv' or 'binary' (little-endian uint64 frame ID, uint64 timestamp)"),
+        "image_buffer_size": (1000, "images buffered between acquiring and saving (uses width x height bytes each)"),
+        "stream_buffer_count": (500, "images buffered by the camera driver during acquisition"),
+        "video_codec": ("auto", "ffmpeg encoder (e.g. 'h264_nvenc', 'libx264', 'mjpeg'). 'auto' uses h264_nvenc or h264_qsv if available. 'raw' saves unencoded video (see transcode_raw.py)"),
+        "video_preset": ("", "encoder preset. Empty uses the fastest low-latency preset. Ignored when video_codec is 'auto', as presets differ between encoders"),
+        "video_crf": (23, "constant quality level. Lower is better quality and larger files"),
+        "video_encoder_threads": (0, "ffmpeg encoder threads. 0 uses every CPU except those reserved for acquiring and saving"),
+        "threaded_io": (True, "acquire and save images in separate threads, buffered in between. false saves each image before acquiring the next (CLI only)"),
+        "color_processing_algorithm": ("NEAREST_NEIGHBOR", "demosaicing used when converting non-Mono8 images to Mono8 (e.g. 'NEAREST_NEIGHBOR', 'HQ_LINEAR')"),
+    }
+
+    # PySpin color processing algorithms accepted for 'color_processing_algorithm'
+    COLOR_PROCESSING_ALGORITHMS = (
+        "DEFAULT", "NO_COLOR_PROCESSING", "NEAREST_NEIGHBOR", "EDGE_SENSING",
+        "HQ_LINEAR", "RIGOROUS", "IPP", "DIRECTIONAL_FILTER",
+    )
+
     def __init__(self, root_dir):
         """
         Args:
@@ -41,20 +61,34 @@ class Config:
             self.config_file_is_new = True
         else:
             self.parameters = self._load_config_file()
+            self._add_missing_parameters()
             self._validate_config()
 
     def _load_config_file(self):
         """Loads the SpinMouse configuration file from disk.
 
+        Uses the fast read-only `tomllib` parser (`tomli` before Python 3.11);
+        `tomlkit` is only needed to write the commented default file.
+
         Returns:
             dict: key-value pairs for configuration parameters
         """
         print(f"Loading 'spinmouse_config.toml' from {self.config_file_path}\n")
-        with open(self.config_file_path, mode="r") as fp:
-            return tomlkit.load(fp)["parameters"]
+
+        try:
+            import tomllib
+        except ModuleNotFoundError:
+            import tomli as tomllib
+
+        with open(self.config_file_path, mode="rb") as fp:
+            parameters = tomllib.load(fp)["parameters"]
+
+        return parameters
 
     def _create_config_file(self):
         """Creates a new SpinMouse configuration file with default values."""
+        import tomlkit
+
         data_path = os.path.join(os.path.dirname(self.config_file_path), "video_data")
 
         doc = tomlkit.document()
@@ -71,6 +105,9 @@ class Config:
         parameters["video_save_framerate"].comment("this does not affect acquisition")
         parameters.add("filename_suffix", tomlkit.string("", literal=True))
         parameters.add("use_acquisition_gui", True)
+        for name, (default, comment) in self.OPTIONAL_PARAMETERS.items():
+            parameters.add(name, default)
+            parameters[name].comment(comment)
 
         doc.add("parameters", parameters)
 
@@ -79,8 +116,42 @@ class Config:
 
         print(f"Config file created at {self.config_file_path}")
 
+    def _add_missing_parameters(self):
+        """Adds default values for optional parameters that are missing from the config file."""
+        for name, (default, comment) in self.OPTIONAL_PARAMETERS.items():
+            if name not in self.parameters:
+                print(f"'{name}' not found in spinmouse_config.toml. Using default value: {default}\n")
+                self.parameters[name] = default
+
     def _validate_config(self):
         """Checks the configuration parameters for validity."""
         if not os.path.exists(self.parameters['data_directory']):
             print("CONFIG ISSUE: Folder defined in 'data_directory' does not exist. Please create folder or edit spinmouse_config.toml\n")
+            self.config_parameters_error = True
+
+        if self.parameters['image_buffer_size'] < 1:
+            print("CONFIG ISSUE: 'image_buffer_size' must be at least 1. Please edit spinmouse_config.toml\n")
+            self.config_parameters_error = True
+
+        if self.parameters['timestamps_format'] not in ("csv", "binary"):
+            print("CONFIG ISSUE: 'timestamps_format' must be 'csv' or 'binary'. Please edit spinmouse_config.toml\n")
+            self.config_parameters_error = True
+
+        if self.parameters['color_processing_algorithm'] not in self.COLOR_PROCESSING_ALGORITHMS:
+            print(f"CONFIG ISSUE: 'color_processing_algorithm' must be one of {', '.join(self.COLOR_PROCESSING_ALGORITHMS)}. Please edit spinmouse_config.toml\n")
+            self.config_parameters_error = True
+
+        if not isinstance(self.parameters['video_codec'], str) or self.parameters['video_codec'].strip() == "":
+            print("CONFIG ISSUE: 'video_codec' must be an ffmpeg encoder name, 'auto' or 'raw'. Please edit spinmouse_config.toml\n")
+            self.config_parameters_error = True
+
+        # bool is a subclass of int, but true/false is not a valid number here
+        video_crf = self.parameters['video_crf']
+        if not isinstance(video_crf, int) or isinstance(video_crf, bool) or not 0 <= video_crf <= 51:
+            print("CONFIG ISSUE: 'video_crf' must be a whole number from 0 to 51. Please edit spinmouse_config.toml\n")
+            self.config_parameters_error = True
+
+        video_encoder_threads = self.parameters['video_encoder_threads']
+        if not isinstance(video_encoder_threads, int) or isinstance(video_encoder_threads, bool) or video_encoder_threads < 0:
+            print("CONFIG ISSUE: 'video_encoder_threads' must be a whole number of at least 0. Please edit spinmouse_config.toml\n")
             self.config_parameters_error = True
\ No newline at end of file
@@ -0,0 +1,176 @@
+import threading
+import numpy as np
+
+
+class RingBuffer:
+    """A bounded single-producer/single-consumer (SPSC) ring buffer of Mono8 images.
+
+    All image slots are preallocated as one (capacity, height, width) array, so
+    acquiring an image is a single copy into the next free slot and no memory is
+    allocated per frame. Each slot also holds the image's frame ID and timestamp.
+
+    Slots are indexed by two counters: `_head` is only ever written by the producer
+    thread and `_tail` only by the consumer thread, so neither side needs a lock to
+    add or remove images. Condition variables are used only to wake the consumer
+    when a new image arrives, or a producer waiting for a free slot, instead of
+    polling, and are only touched while the other side is actually waiting.
+
+    The consumer reads the oldest image in place with `peek` and hands the slot
+    back with `pop` once it is done with it.
+
+    Without an `image_shape`, the buffer only holds frame IDs and timestamps.
+
+    Attributes:
+        capacity (int): Maximum number of images held by the buffer
+        frames (numpy.ndarray): Image slots with shape (capacity, height, width), or None
+        frame_ids (list): Frame ID of the image in each slot
+        timestamps (list): Timestamp of the image in each slot
+        overflow_count (int): Number of images discarded because the buffer was full
+    """
+    def __init__(self, capacity, image_shape=None):
+        """
+        Args:
+            capacity (int): Maximum number of images held by the buffer
+            image_shape (tuple, optional): Image (height, width) in pixels. If None,
+                only frame IDs and timestamps are stored.
+        """
+        self.capacity = capacity
+        self.frames = None if image_shape is None else np.empty((capacity, *image_shape), dtype=np.uint8)
+        self.frame_ids = [0] * capacity
+        self.timestamps = [0] * capacity
+        self.overflow_count = 0
+
+        self._head = 0  # total images appended (producer only)
+        self._tail = 0  # total images popped (consumer only)
+        self._not_empty = threading.Condition()
+        self._consumer_waiting = False
+        self._not_full = threading.Condition()
+        self._producer_waiting = False
+
+    def __len__(self):
+        """Returns the number of images waiting in the buffer."""
+        return self._head - self._tail
+
+    def append(self, image, frame_id=0, timestamp=0, timeout=0):
+        """Copies an image into the next free slot and wakes the consumer. Called by the producer.
+
+        If the buffer is still full after `timeout`, the image is discarded and
+        `overflow_count` is incremented.
+
+        Args:
+            image (numpy.ndarray): Mono8 image with shape (height, width), or None
+                if the buffer has no image slots
+            frame_id (int, optional): Frame ID from image chunk data
+            timestamp (int, optional): Timestamp from image chunk data
+            timeout (float, optional): Maximum time to wait for a free slot in seconds.
+                If 0, a full buffer discards the image immediately.
+
+        Returns:
+            bool: True, if the image was added. False otherwise.
+        """
+        if self._head - self._tail >= self.capacity and self._wait_not_full(timeout) is False:
+            self.overflow_count += 1
+            return False
+
+        slot = self._head % self.capacity
+        if self.frames is not None:
+            np.copyto(self.frames[slot], image)
+        self.frame_ids[slot] = frame_id
+        self.timestamps[slot] = timestamp
+        self._head += 1
+
+        # The consumer sets this flag before checking for images, so if it is not
+        # set here, the consumer will see the new image without being notified.
+        if self._consumer_waiting:
+            with self._not_empty:
+                self._not_empty.notify()
+
+        return True
+
+    def peek(self):
+        """Returns the slot index of the oldest image. Called by the consumer.
+
+        The slot is not reused until `pop` is called.
+
+        Raises:
+            IndexError: If the buffer is empty.
+        """
+        if self._head == self._tail:
+            raise IndexError("peek from an empty ring buffer")
+
+        return self._tail % self.capacity
+
+    def peek_run(self, max_count):
+        """Returns the oldest images that are stored next to each other. Called by the consumer.
+
+        `frames[slot:slot + count]` is a single contiguous block of images, which
+        stops at the end of `frames` when the buffer wraps around. The slots are
+        not reused until `pop(count)` is called.
+
+        Args:
+            max_count (int): Maximum number of images to return
+
+        Returns:
+            tuple: (slot, count) of the first image and the number of images
+
+        Raises:
+            IndexError: If the buffer is empty.
+        """
+        slot = self.peek()
+        count = min(self._head - self._tail, self.capacity - slot, max_count)
+
+        return slot, count
+
+    def pop(self, count=1):
+        """Frees the slots of the oldest images. Called by the consumer.
+
+        Args:
+            count (int, optional): Number of images to free
+        """
+        if self._head - self._tail < count:
+            raise IndexError("pop from an empty ring buffer")
+
+        self._tail += count
+
+        # same handshake as `append`, for a producer waiting on a full buffer
+        if self._producer_waiting:
+            with self._not_full:
+                self._not_full.notify()
+
+    def wait(self, timeout=None):
+        """Blocks until the buffer is not empty. Called by the consumer.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds
+
+        Returns:
+            bool: True, if the buffer is not empty. False, if the wait timed out.
+        """
+        if self._head != self._tail:
+            return True
+
+        with self._not_empty:
+            self._consumer_waiting = True
+            try:
+                return self._not_empty.wait_for(lambda: self._head != self._tail, timeout)
+            finally:
+                self._consumer_waiting = False
+
+    def _wait_not_full(self, timeout):
+        """Blocks until the buffer has a free slot. Called by the producer.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds
+
+        Returns:
+            bool: True, if a slot is free. False, if the wait timed out.
+        """
+        if timeout <= 0:
+            return False
+
+        with self._not_full:
+            self._producer_waiting = True
+            try:
+                return self._not_full.wait_for(lambda: self._head - self._tail < self.capacity, timeout)
+            finally:
+                self._producer_waiting = False
@@ -0,0 +1,85 @@
+import ctypes
+import os
+import sys
+import threading
+
+
+THREAD_PRIORITY_HIGHEST = 2  # Windows SetThreadPriority value
+REALTIME_PRIORITY = 10  # Linux SCHED_FIFO priority (1-99)
+
+
+def pin_current_thread(cpu):
+    """Restricts the calling thread to a single CPU, if the system has one with that index.
+
+    Keeps the OS scheduler from migrating time-critical threads between CPUs.
+    On Linux, `cpu` indexes the CPUs the process is allowed to run on (e.g. when
+    limited by taskset or a container), rather than every CPU in the system.
+    This is best effort: failures are ignored and reported through the return value.
+
+    Args:
+        cpu (int): Index of the CPU
+
+    Returns:
+        bool: True, if the thread was pinned. False otherwise.
+    """
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            allowed_cpus = sorted(os.sched_getaffinity(0))  # 0 is the calling thread on Linux
+            if cpu >= len(allowed_cpus):
+                return False
+
+            os.sched_setaffinity(0, {allowed_cpus[cpu]})
+            return True
+
+        if cpu >= (os.cpu_count() or 1):
+            return False
+
+        if sys.platform == "win32":
+            kernel32 = ctypes.windll.kernel32
+            return kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), 1 << cpu) != 0
+
+    except OSError:
+        pass
+
+    return False
+
+
+def raise_current_thread_priority():
+    """Raises the scheduling priority of the calling thread, if permitted.
+
+    On Windows the thread is registered with the Multimedia Class Scheduler Service
+    (MMCSS) as a "Capture" task, or failing that set to THREAD_PRIORITY_HIGHEST. On
+    Linux it is moved to the SCHED_FIFO real-time policy, or failing that its nice
+    value is lowered, which requires CAP_SYS_NICE (or root). Failures are ignored.
+
+    Returns:
+        bool: True, if the priority was raised. False otherwise.
+    """
+    try:
+        if sys.platform == "win32":
+            # MMCSS boosts the thread while it runs and is reverted when the thread exits
+            try:
+                task_index = ctypes.c_ulong(0)
+                if ctypes.windll.avrt.AvSetMmThreadCharacteristicsW("Capture", ctypes.byref(task_index)):
+                    return True
+            except OSError:
+                pass  # avrt.dll not available: fall back to a higher thread priority
+
+            kernel32 = ctypes.windll.kernel32
+            return kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_HIGHEST) != 0
+
+        if hasattr(os, "sched_setscheduler"):
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(REALTIME_PRIORITY))  # 0 is the calling thread
+                return True
+            except OSError:
+                pass  # not permitted: fall back to a lower nice value
+
+        if hasattr(os, "setpriority"):
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), -5)
+            return True
+
+    except OSError:
+        pass
+
+    return False
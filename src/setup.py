@@ -3,9 +3,9 @@ import tkinter as tk
 from PIL import Image, ImageTk
 import traceback
 import threading
-from collections import deque
 from datetime import date
 from src.acquire import acquire_images
+from src.ring_buffer import RingBuffer
 
 
 class SetupGUI:
@@ -23,7 +23,7 @@ class SetupGUI:
         """
         Args:
             acquisition_complete_event (threading.Event): When set, signals when all thread should stop
-            images_queue (collections.deque): Threadsafe image buffer
+            images_queue (RingBuffer): Threadsafe image buffer
             camera_system (CameraSystem) Reference to CameraSystem object
             config (Config): Reference to Config object
         """
@@ -50,6 +50,11 @@ class SetupGUI:
         self.gui_vid.grid(row=0, column=0)
         self.gui_vid.bind('<Button-1>', self.mouse_click_callback)
 
+        # images are pasted into one PhotoImage, instead of creating a new one for every image
+        image_height, image_width = camera_system.camera.get_image_shape()
+        self.video_image = ImageTk.PhotoImage(image=Image.new('L', (image_width, image_height)))
+        self.gui_vid.configure(image=self.video_image)
+
         # instructions
         self.gui_instructions_label = tk.Label(
             self.gui_controls_frame,
@@ -112,22 +117,39 @@ class SetupGUI:
 
         event.x and event.y are the x,y coordinates within the video frame
         """
-        offsetx_delta = event.x - self.gui_vid.image.width()/2
-        offsety_delta = event.y - self.gui_vid.image.height()/2
+        offsetx_delta = event.x - self.video_image.width()/2
+        offsety_delta = event.y - self.video_image.height()/2
 
         self.camera_system.camera.update_image_offset(offsetx_delta, offsety_delta)
 
     def update_video(self):
         """Update video image, if possible."""
-        if len(self.images_queue) > 0:
-            new_image = self.images_queue.popleft()
-            img = Image.fromarray(new_image.GetNDArray())
-            imgtk = ImageTk.PhotoImage(image=img)
-            self.gui_vid.configure(image=imgtk)
-            self.gui_vid.image = imgtk  # To prevent garbage collection of imgtk
-
-        # This creates a feedback loop causing "update_video" to be called at a fixed interval
-        self.gui.after(5, self.update_video)
+        # skip drawing while the window is minimized or hidden, but keep the buffer empty
+        if not self.gui_vid.winfo_viewable():
+            images_waiting = len(self.images_queue)
+            if images_waiting > 0:
+                self.images_queue.pop(images_waiting)
+            self.gui.after(50, self.update_video)
+            return
+
+        # only show the newest image, skipping any that queued up while the GUI was busy
+        images_waiting = len(self.images_queue)
+        if images_waiting > 1:
+            self.images_queue.pop(images_waiting - 1)
+
+        try:
+            slot = self.images_queue.peek()
+        except IndexError:
+            delay = 15  # no new image yet, check again at ~60Hz
+        else:
+            delay = 1  # images are arriving, check again almost immediately
+            # buffer slots are C-contiguous Mono8, so PIL can use the slot's memory directly
+            image = self.images_queue.frames[slot]
+            self.video_image.paste(Image.frombuffer('L', (image.shape[1], image.shape[0]), image, 'raw', 'L', 0, 1))
+            self.images_queue.pop()  # PhotoImage holds its own copy of the pixels
+
+        # This creates a feedback loop causing "update_video" to be called repeatedly
+        self.gui.after(delay, self.update_video)
 
 
 def setup_experiment(camera_system, config):
@@ -142,8 +164,12 @@ def setup_experiment(camera_system, config):
     """
     result = True
 
+    # images are saved as Mono8, so have the camera send Mono8 instead of converting each frame
+    if camera_system.camera.set_pixel_format_mono8() is False:
+        print("Unable to set pixel format to Mono8: images will be converted during acquisition")
+
     # threadsafe image buffer and stop event
-    images_queue = deque(maxlen=10)
+    images_queue = RingBuffer(10, camera_system.camera.get_image_shape())
     acquisition_complete_event = threading.Event()
 
     # Create thread for acquiring images
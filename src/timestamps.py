@@ -0,0 +1,86 @@
+import os
+import struct
+
+
+class TimestampLog:
+    """Saves the frame ID and camera timestamp of each saved frame.
+
+    Two formats are supported:
+        'csv': '<file_path>_timestamps.csv' with one "frame_id,timestamp" row per frame.
+        'binary': '<file_path>_timestamps.bin' with one 16-byte record per frame
+            (little-endian uint64 frame ID, uint64 timestamp), plus a
+            '<file_path>_timestamps.toml' sidecar describing the record layout.
+            This skips converting integers to text on every frame.
+
+    It can be used as a context manager to ensure the file is closed.
+
+    Attributes:
+        log_format (str): 'csv' or 'binary'
+        file_path (str): Path to the timestamps file
+    """
+    FILE_BUFFER_SIZE = 1 << 20  # bytes buffered before a write to disk
+    RECORD = struct.Struct("<QQ")
+
+    def __init__(self, file_path, log_format="csv"):
+        """
+        Args:
+            file_path (str): Path to the video file without extension
+            log_format (str): 'csv' or 'binary'
+        """
+        self.log_format = log_format
+
+        if log_format == "binary":
+            self.file_path = file_path + "_timestamps.bin"
+            self._file = open(self.file_path, "wb", buffering=self.FILE_BUFFER_SIZE)
+            self._write_binary_schema(file_path + "_timestamps.toml")
+        else:
+            self.file_path = file_path + "_timestamps.csv"
+            self._file = open(self.file_path, "wb", buffering=self.FILE_BUFFER_SIZE)
+            self._csv_buffer = bytearray()
+
+    def __enter__(self):
+        """Enters the context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Exits the context manager."""
+        self.close()
+
+    def _write_binary_schema(self, schema_file_path):
+        """Writes a sidecar file describing the binary record layout."""
+        with open(schema_file_path, "w") as fp:
+            fp.write('format = "little-endian uint64 frame_id, uint64 timestamp"\n')
+            fp.write(f'record_size = {self.RECORD.size}\n')
+
+    def write(self, frame_id, timestamp):
+        """Adds the frame ID and timestamp of a frame to the log.
+
+        Args:
+            frame_id (int): Frame ID from image chunk data
+            timestamp (int): Timestamp from image chunk data
+        """
+        if self.log_format == "binary":
+            self._file.write(self.RECORD.pack(frame_id, timestamp))
+        else:
+            # Rows are plain integers, so they are formatted directly instead of going
+            # through the csv module. Lines end in '\r\n', like csv.writer's.
+            self._csv_buffer += b"%d,%d\r\n" % (frame_id, timestamp)
+            if len(self._csv_buffer) >= self.FILE_BUFFER_SIZE:
+                self._write_csv_buffer()
+
+    def _write_csv_buffer(self):
+        """Writes the collected rows with a single call, which bypasses the file's own buffer."""
+        self._file.write(self._csv_buffer)
+        self._csv_buffer.clear()
+
+    def close(self):
+        """Writes any remaining rows, then flushes the file to disk once and closes it."""
+        if self._file.closed:
+            return
+
+        if self.log_format == "csv":
+            self._write_csv_buffer()
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
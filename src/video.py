@@ -0,0 +1,406 @@
+import functools
+import os
+import subprocess
+
+
+# Container used for each encoder. Anything not listed is saved as MP4.
+VIDEO_FILE_EXTENSIONS = {
+    "mjpeg": ".avi",
+    "raw": ".raw",
+}
+
+# Motion JPEG quality (2-31, lower is better). 'video_crf' only applies to H.264.
+MJPEG_QUALITY = 3
+
+
+class VideoWriterError(OSError):
+    """Raised when a video could not be written, e.g. because ffmpeg exited."""
+
+
+@functools.lru_cache(maxsize=None)
+def encoder_is_available(codec):
+    """Checks whether ffmpeg can open a given encoder on this machine.
+
+    Hardware encoders (e.g. h264_nvenc) can be compiled into ffmpeg without
+    a usable GPU being present, so a tiny test encode is the only reliable check.
+
+    Args:
+        codec (str): Name of the ffmpeg encoder (e.g. 'h264_nvenc')
+
+    Returns:
+        bool: True, if the encoder works. False otherwise.
+    """
+    command = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", "color=size=256x256",
+        "-frames:v", "1", "-c:v", codec, "-f", "null", "-",
+    ]
+    try:
+        return subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+    except OSError:
+        return False
+
+
+# Hardware H.264 encoders tried by codec 'auto', in order of preference
+HARDWARE_ENCODERS = ("h264_nvenc", "h264_qsv")
+
+
+def select_encoder(codec="auto"):
+    """Resolves the 'auto' codec to the fastest H.264 encoder that works on this machine.
+
+    Hardware encoders (NVIDIA NVENC, then Intel Quick Sync) are preferred, with
+    libx264 as the software fallback.
+
+    Args:
+        codec (str): Name of an ffmpeg encoder, or 'auto'
+
+    Returns:
+        str: Name of the ffmpeg encoder
+    """
+    if codec != "auto":
+        return codec
+
+    for encoder in HARDWARE_ENCODERS:
+        if encoder_is_available(encoder):
+            return encoder
+
+    return "libx264"
+
+
+def video_file_extension(codec):
+    """Returns the video file extension used for an encoder.
+
+    Args:
+        codec (str): Name of an ffmpeg encoder, or 'auto'
+
+    Returns:
+        str: File extension, including the dot
+    """
+    return VIDEO_FILE_EXTENSIONS.get(codec, ".mp4")
+
+
+def encoder_options(codec, preset="", crf=23, framerate=None):
+    """Returns ffmpeg output options for an encoder.
+
+    Args:
+        codec (str): Name of the ffmpeg encoder
+        preset (str, optional): Encoder preset. If empty, the fastest low-latency preset.
+        crf (int, optional): Constant quality level (lower is better quality, larger files)
+        framerate (int or float, optional): Video framerate. If given, H.264 videos
+            get one keyframe per second.
+
+    Returns:
+        list: ffmpeg command line options
+    """
+    # H.264 needs 4:2:0 (yuv420p, or nv12 for Quick Sync): the gray input becomes
+    # its Y plane and U/V are constant.
+    # Other encoders are left to pick the pixel format closest to gray.
+    gop_options = ["-g", str(round(framerate))] if framerate else []
+
+    if codec == "h264_nvenc":
+        # no B-frames: each frame is encoded as soon as it arrives
+        return ["-preset", preset or "p1", "-tune", "ull", "-bf", "0", *gop_options,
+                "-rc", "constqp", "-qp", str(crf), "-pix_fmt", "yuv420p"]
+
+    if codec == "h264_qsv":
+        return ["-preset", preset or "veryfast", "-bf", "0", *gop_options,
+                "-global_quality", str(crf), "-pix_fmt", "nv12"]
+
+    if codec == "libx264":
+        # zerolatency already disables B-frames (so B-pyramids) and lookahead, and uses
+        # sliced threads; fixed keyframe spacing also skips scene-cut keyframe decisions
+        keyint_options = ["-keyint_min", gop_options[1], "-sc_threshold", "0"] if gop_options else []
+        return ["-preset", preset or "ultrafast", "-tune", "zerolatency", *gop_options, *keyint_options,
+                "-crf", str(crf), "-pix_fmt", "yuv420p"]
+
+    if codec == "mjpeg":
+        # every frame is an independent JPEG, so ffmpeg can encode several frames at once
+        return ["-q:v", str(MJPEG_QUALITY)]
+
+    return ["-preset", preset] if preset else []
+
+
+def transcode_options(codec, preset="", crf=23):
+    """Returns ffmpeg output options for encoding a recorded video offline.
+
+    Unlike `encoder_options`, nothing here needs to keep up with the camera, so
+    H.264 encoders use quality-oriented presets with B-frames, lookahead and
+    scene-cut keyframes, for much smaller files at the same quality.
+
+    Args:
+        codec (str): Name of the ffmpeg encoder
+        preset (str, optional): Encoder preset. If empty, a quality-oriented preset.
+        crf (int, optional): Constant quality level (lower is better quality, larger files)
+
+    Returns:
+        list: ffmpeg command line options
+    """
+    if codec == "libx264":
+        return ["-preset", preset or "medium", "-crf", str(crf), "-pix_fmt", "yuv420p"]
+
+    if codec == "h264_nvenc":
+        return ["-preset", preset or "slow", "-rc", "vbr", "-cq", str(crf), "-b:v", "0", "-pix_fmt", "yuv420p"]
+
+    if codec == "h264_qsv":
+        return ["-preset", preset or "slow", "-global_quality", str(crf), "-pix_fmt", "nv12"]
+
+    return encoder_options(codec, preset, crf)
+
+
+class VideoWriter:
+    """Saves Mono8 frames to a H.264 video by piping raw video to an ffmpeg subprocess.
+
+    Encoding happens in ffmpeg's own (multi-threaded) process, so writing a frame
+    only costs a copy into the pipe. With codec 'auto', the GPU encoder (h264_nvenc)
+    is used when available, then Intel Quick Sync (h264_qsv), otherwise ffmpeg falls
+    back to the libx264 software encoder.
+    With codec 'mjpeg', frames are saved as Motion JPEG in an AVI file instead.
+
+    It can be used as a context manager to ensure the video file is finalized.
+
+    Attributes:
+        file_path (str): Path to the video file
+        codec (str): Name of the ffmpeg encoder
+        process (subprocess.Popen): The ffmpeg process
+    """
+    PIPE_BUFFER_SIZE = 1 << 20  # bytes
+
+    def __init__(self, file_path, frame_size, framerate, codec="auto", preset="", crf=23, threads=0):
+        """
+        Args:
+            file_path (str): Path to the video file without extension
+            frame_size (tuple): Image (width, height) in pixels
+            framerate (int or float): Framerate of the saved video (does not affect acquisition)
+            codec (str, optional): Name of an ffmpeg encoder, or 'auto'
+            preset (str, optional): Encoder preset. If empty, the fastest low-latency preset.
+            crf (int, optional): Constant quality level (lower is better quality, larger files)
+            threads (int, optional): Number of encoder threads. If 0, all CPUs except
+                the two used by the acquisition and saving threads.
+        """
+        self.codec = select_encoder(codec)
+        self.file_path = file_path + video_file_extension(self.codec)
+        codec_options = encoder_options(self.codec, preset, crf, framerate)
+
+        if threads == 0:
+            threads = max(1, (os.cpu_count() or 1) - 2)
+
+        width, height = frame_size
+        command = [
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-nostats",
+            "-f", "rawvideo", "-pix_fmt", "gray", "-s", f"{width}x{height}", "-r", str(framerate),
+            "-i", "pipe:",
+            "-c:v", self.codec, *codec_options, "-threads", str(threads),
+            # let the muxer fill its output buffer instead of flushing the file after every packet
+            "-flush_packets", "0",
+            self.file_path,
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, bufsize=self.PIPE_BUFFER_SIZE)
+
+    def __enter__(self):
+        """Enters the context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Exits the context manager."""
+        self.release()
+
+    def write(self, frame):
+        """Sends a frame, or several consecutive frames, to the encoder.
+
+        The frame's buffer is written to the pipe directly, avoiding the
+        intermediate bytes copy made by `tobytes()`.
+
+        Args:
+            frame (numpy.ndarray): C-contiguous Mono8 image with shape (height, width),
+                or images with shape (count, height, width)
+
+        Raises:
+            VideoWriterError: If ffmpeg is no longer accepting frames (e.g. it exited).
+        """
+        try:
+            self.process.stdin.write(memoryview(frame).cast("B"))
+        except OSError as ex:  # BrokenPipeError once ffmpeg has exited
+            raise VideoWriterError(f"ffmpeg stopped encoding {self.file_path} (exit code {self.process.poll()})") from ex
+
+    def release(self):
+        """Closes the pipe and waits for ffmpeg to finish writing the video file.
+
+        Raises:
+            VideoWriterError: If ffmpeg failed to encode the video.
+        """
+        if self.process.stdin.closed is False:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass  # ffmpeg already exited, which is reported below
+
+        returncode = self.process.wait()
+        if returncode != 0:
+            raise VideoWriterError(f"ffmpeg exited with code {returncode} while encoding {self.file_path}")
+
+
+class RawVideoWriter:
+    """Saves Mono8 frames unencoded, to be transcoded after the recording.
+
+    Frames are appended to '<file_path>.raw' back to back, so saving is a single
+    sequential write per frame with no encoding at all. The frame size and
+    framerate are saved in a '<file_path>_raw.toml' sidecar, which is used by
+    `transcode_raw_video`. Raw video uses width x height bytes per frame.
+
+    Every SYNC_INTERVAL bytes, the written data is flushed to disk and dropped
+    from the page cache (where supported), so dirty pages don't pile up and
+    stall a long recording with one huge writeback.
+
+    Disk space is reserved PREALLOCATE_SIZE bytes ahead of the data (where
+    supported), so the file grows in large contiguous extents instead of
+    fragmenting. The unused reservation is trimmed on release; if the program
+    crashes, the file may end in blank frames.
+
+    It has the same interface as `VideoWriter`.
+
+    Attributes:
+        file_path (str): Path to the raw video file
+        codec (str): Always 'raw'
+    """
+    SYNC_INTERVAL = 64 << 20  # bytes
+    PREALLOCATE_SIZE = 256 << 20  # bytes
+
+    def __init__(self, file_path, frame_size, framerate, **kwargs):
+        """
+        Args:
+            file_path (str): Path to the video file without extension
+            frame_size (tuple): Image (width, height) in pixels
+            framerate (int or float): Framerate of the saved video (does not affect acquisition)
+            **kwargs: Encoder options accepted by `VideoWriter`, which are ignored
+        """
+        self.file_path = file_path + video_file_extension("raw")
+        self.codec = "raw"
+
+        width, height = frame_size
+        with open(file_path + "_raw.toml", "w") as fp:
+            fp.write('pixel_format = "gray"\n')
+            fp.write(f'width = {width}\n')
+            fp.write(f'height = {height}\n')
+            fp.write(f'framerate = {framerate}\n')
+
+        self._file = open(self.file_path, "wb")
+        self._bytes_written = 0
+        self._bytes_synced = 0
+        self._bytes_allocated = 0
+        self._preallocate()
+
+    def __enter__(self):
+        """Enters the context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Exits the context manager."""
+        self.release()
+
+    def write(self, frame):
+        """Appends a frame, or several consecutive frames, to the raw video file.
+
+        Args:
+            frame (numpy.ndarray): C-contiguous Mono8 image with shape (height, width),
+                or images with shape (count, height, width)
+        """
+        self._bytes_written += self._file.write(memoryview(frame).cast("B"))
+
+        if self._bytes_written - self._bytes_synced >= self.SYNC_INTERVAL:
+            self._sync()
+
+    def _sync(self):
+        """Flushes written frames to disk and drops them from the page cache."""
+        self._file.flush()
+        fd = self._file.fileno()
+
+        if hasattr(os, "fdatasync"):
+            os.fdatasync(fd)
+        else:
+            os.fsync(fd)
+
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, self._bytes_written, os.POSIX_FADV_DONTNEED)
+
+        self._bytes_synced = self._bytes_written
+        self._preallocate()
+
+    def _preallocate(self):
+        """Reserves disk space ahead of the written data, if it is running low."""
+        if hasattr(os, "posix_fallocate") is False:
+            return
+
+        if self._bytes_allocated - self._bytes_written < self.PREALLOCATE_SIZE // 2:
+            try:
+                os.posix_fallocate(self._file.fileno(), self._bytes_allocated, self.PREALLOCATE_SIZE)
+                self._bytes_allocated += self.PREALLOCATE_SIZE
+            except OSError:
+                pass  # not supported by the file system: the file grows as it is written
+
+    def release(self):
+        """Closes the raw video file, trimming any unused preallocated space."""
+        if self._file.closed is False:
+            try:
+                self._sync()
+                self._file.truncate(self._bytes_written)
+            finally:
+                self._file.close()
+
+
+def open_video_writer(file_path, frame_size, framerate, codec="auto", **kwargs):
+    """Returns a `RawVideoWriter` for codec 'raw', otherwise a `VideoWriter`.
+
+    Args:
+        file_path (str): Path to the video file without extension
+        frame_size (tuple): Image (width, height) in pixels
+        framerate (int or float): Framerate of the saved video (does not affect acquisition)
+        codec (str, optional): Name of an ffmpeg encoder, 'auto', or 'raw'
+        **kwargs: Other `VideoWriter` arguments
+
+    Returns:
+        VideoWriter or RawVideoWriter: The video writer
+    """
+    if codec == "raw":
+        return RawVideoWriter(file_path, frame_size, framerate)
+
+    return VideoWriter(file_path, frame_size, framerate, codec=codec, **kwargs)
+
+
+def transcode_raw_video(raw_file_path, codec="libx264", preset="", crf=23, threads=0):
+    """Encodes a video saved by `RawVideoWriter`.
+
+    The encoded video is saved next to the raw video file, which is kept. Encoding
+    options come from `transcode_options`, not the realtime `encoder_options`.
+
+    Args:
+        raw_file_path (str): Path to the '.raw' video file
+        codec (str, optional): Name of an ffmpeg encoder, or 'auto'
+        preset (str, optional): Encoder preset. If empty, a quality-oriented preset.
+        crf (int, optional): Constant quality level (lower is better quality, larger files)
+        threads (int, optional): Number of encoder threads. If 0, ffmpeg decides.
+
+    Returns:
+        str: Path to the encoded video file
+    """
+    try:
+        import tomllib
+    except ModuleNotFoundError:
+        import tomli as tomllib
+
+    file_path = os.path.splitext(raw_file_path)[0]
+    with open(file_path + "_raw.toml", "rb") as fp:
+        video_info = tomllib.load(fp)
+
+    codec = select_encoder(codec)
+    video_file_path = file_path + video_file_extension(codec)
+    command = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", video_info["pixel_format"],
+        "-s", f"{video_info['width']}x{video_info['height']}", "-r", str(video_info["framerate"]),
+        "-i", raw_file_path,
+        "-c:v", codec, *transcode_options(codec, preset, crf), "-threads", str(threads),
+        video_file_path,
+    ]
+    subprocess.run(command, check=True)
+
+    return video_file_path
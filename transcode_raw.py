@@ -0,0 +1,38 @@
+from src.video import transcode_raw_video
+import argparse
+import subprocess
+import sys
+
+
+def main():
+    """
+    Encodes raw videos saved with video_codec = "raw".
+
+    Returns:
+        bool: True, if all videos were encoded successfully. False otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Encode raw SpinMouse videos")
+    parser.add_argument("raw_file_paths", nargs="+", help="'.raw' video files")
+    parser.add_argument("--codec", default="libx264", help="ffmpeg encoder (default libx264), or 'auto' for a hardware encoder if available")
+    parser.add_argument("--preset", default="", help="encoder preset (default: a quality-oriented preset, e.g. 'medium' for libx264)")
+    parser.add_argument("--crf", type=int, default=23, help="constant quality level (default 23)")
+    args = parser.parse_args()
+
+    exit_status = True
+
+    for raw_file_path in args.raw_file_paths:
+        try:
+            video_file_path = transcode_raw_video(raw_file_path, args.codec, args.preset, args.crf)
+            print(f"Saved {video_file_path}")
+        except (OSError, subprocess.CalledProcessError) as ex:
+            print(f"Error: unable to encode {raw_file_path}: {ex}")
+            exit_status = False
+
+    return exit_status
+
+
+if __name__ == "__main__":
+    if main():
+        sys.exit(0)
+    else:
+        sys.exit(1)